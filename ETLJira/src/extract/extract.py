@@ -2,21 +2,57 @@ from utils.config import Config
 from utils.jira_client import JiraClient
 import logging
 import math
+import asyncio
+from collections import deque
 
 class Extract:
     def __init__(self,config:Config,jira_client:JiraClient):
         self.config = config
         self.jira_client = jira_client
         self.logger = logging.getLogger(config.LOGGER_NAME)
-        self.BATCH_SIZE = int(config.BATCH_SIZE)
+        self.BATCH_SIZE = config.BATCH_SIZE
 
-    def extract_batch_issues(self,start:int =0,batch_size:int=50):
-        batch_issues = self.jira_client.getBatchIssues(start,batch_size)
-        self.logger.info(f"[BATCH 1]: nombre d'issues {len(batch_issues['issues'])}...")
-        return batch_issues['issues']
+    async def extract_batch_issues(self,start:int =0,batch_size:int=50):
+        batch_issues = [
+            issue async for issue in self.jira_client.iter_batch_issues(
+                start,batch_size,fields=self.config.JIRA_FIELDS,expand=self.config.JIRA_EXPAND
+            )
+        ]
+        self.logger.info(f"[BATCH {start}]: nombre d'issues {len(batch_issues)}...")
+        return batch_issues
 
-    def getNbTotalIssuer(self):
-        total = self.jira_client.countTotalIussues(self.config.JIRA_PROJECT)
+    async def prefetched_batches(self,starts,depth:int=2):
+        """
+        Yield (start, fetch_task) in order with at most `depth` pages in flight,
+        the one being handed downstream included: the following pages are already
+        requested, and a new one is only sent once the consumer comes back.
+        """
+        starts = iter(starts)
+        pending = deque()
+
+        def schedule(start):
+            self.logger.info(f"Prefetching batch starting at index {start}")
+            pending.append((start, asyncio.create_task(self.extract_batch_issues(start, self.BATCH_SIZE))))
+
+        try:
+            for _ in range(max(1, depth)):
+                start = next(starts, None)
+                if start is None:
+                    break
+                schedule(start)
+            while pending:
+                start, fetch = pending.popleft()
+                yield start, fetch
+                next_start = next(starts, None)
+                if next_start is not None:
+                    schedule(next_start)
+        finally:
+            # Consumer stopped early: do not leave requests running in the background
+            for _, fetch in pending:
+                fetch.cancel()
+
+    async def getNbTotalIssuer(self):
+        total = await self.jira_client.countTotalIussues(self.config.JIRA_PROJECT)
         self.logger.info(f"Nombre total d'issues trouvés: {total}.")
         return total
 
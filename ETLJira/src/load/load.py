@@ -1,7 +1,12 @@
 from utils.config import Config
 from utils.jira_client import JiraClient
 from utils.file_manager import FileManager
+from utils.json_utils import dumps_line
 import logging
+import asyncio
+
+OUTPUT_MODE_PER_ISSUE = "per-issue"
+OUTPUT_MODE_AGGREGATED = "aggregated"
 
 
 class Load:
@@ -10,17 +15,74 @@ class Load:
         self.file_manager = FileManager(config=config)
         self.jira_client= jira_client
         self.logger = logging.getLogger(self.config.LOGGER_NAME)
+        self.output_mode = self.config.OUTPUT_MODE
+        if self.output_mode not in (OUTPUT_MODE_PER_ISSUE, OUTPUT_MODE_AGGREGATED):
+            raise ValueError(f"OUTPUT_MODE invalide: {self.output_mode}")
+        self._run_dir = None
+        self._ndjson_writer = None
+
+    def open(self):
+        # Aggregated mode: every issue of the run goes to a single NDJSON file of its own run folder
+        if self.output_mode == OUTPUT_MODE_AGGREGATED:
+            self._run_dir = self.file_manager.create_run_folder(self.config.ETL_OUTPUT_DIR)
+            self._ndjson_writer = self.file_manager.open_ndjson_writer(self._run_dir)
+
+    def close(self):
+        if self._ndjson_writer is not None:
+            self._ndjson_writer.close()
+            self._ndjson_writer = None
 
-    def save_issue(self,issue):
+    async def save_batch(self,issues,batch_start=0):
+        if self.output_mode == OUTPUT_MODE_AGGREGATED:
+            await self._save_batch_aggregated(issues, batch_start)
+            return
+
+        # All the folders of the batch are created up front, then the issues are written concurrently
+        issue_dirs = self.file_manager.create_issue_folders(
+            self.config.ETL_OUTPUT_DIR, [issue.get('key') for issue in issues]
+        )
+        await asyncio.gather(*(
+            self.save_issue(issue, issue_dir) for issue, issue_dir in zip(issues, issue_dirs)
+        ))
+
+    async def save_issue(self,issue,issue_dir=None):
         issue_key = issue.get('key')
-        issue_dir = self.file_manager.create_issue_folder(self.config.ETL_OUTPUT_DIR, issue_key)
-        self.file_manager.save_json(issue, issue_dir, issue_key)
+        if issue_dir is None:
+            issue_dir = self.file_manager.create_issue_folder(self.config.ETL_OUTPUT_DIR, issue_key)
+        await self.file_manager.save_json(issue, issue_dir, issue_key)
         attachments = issue.get("fields", {}).get("attachment", [])
 
         if attachments:
-            self.jira_client.download_attachments(issue_key, attachments, issue_dir)
+            await self.jira_client.download_attachments(issue_key, attachments, issue_dir)
         else:
             self.logger.info(f"[{issue_key}] Pas d'attachments.")
 
+    async def _save_batch_aggregated(self,issues,batch_start):
+        """
+        Append each issue as a {key, data} NDJSON line, stream the attachments of
+        the batch into one zip archive and write a small index for lookup.
+        """
+        index = {}
+        to_download = []
+        for issue in issues:
+            issue_key = issue.get('key')
+            attachments = issue.get("fields", {}).get("attachment", [])
+            offset = self._ndjson_writer.tell()
+            self._ndjson_writer.write(dumps_line({"key": issue_key, "data": issue}))
+            index[issue_key] = {"offset": offset, "attachments": []}
+            if attachments:
+                to_download.append((issue_key, attachments))
+
+        if to_download:
+            with self.file_manager.open_attachment_archive(self._run_dir, batch_start) as archive:
+                archived = await asyncio.gather(*(
+                    self.jira_client.download_attachments_to_archive(issue_key, attachments, archive)
+                    for issue_key, attachments in to_download
+                ))
+            # Only the attachments actually written to the zip are indexed
+            for (issue_key, _), entries in zip(to_download, archived):
+                index[issue_key]["attachments"] = entries
 
-    
\ No newline at end of file
+        await self.file_manager.save_batch_index(
+            {"batch_start": batch_start, "issues": index}, self._run_dir, batch_start
+        )
@@ -2,13 +2,32 @@ from utils.config import Config
 from utils.jira_client import JiraClient
 from utils.logger import setup_logging
 from pipeline.pipeline import Pipeline
+import argparse
+import asyncio
 
 
-config = Config()
-setup_logging(config.LOGS_DIR,config.DEBUG_LEVEL,config.LOGGER_NAME)
+def parse_args():
+    parser = argparse.ArgumentParser(description="ETL Jira: extraction, transformation et sauvegarde des issues")
+    parser.add_argument(
+        "--refresh-metadata",
+        action="store_true",
+        help="ignore le cache disque des métadonnées des champs et les recharge depuis Jira",
+    )
+    return parser.parse_args()
 
-jira_client = JiraClient(config=config)
-pipeline = Pipeline(config=config,jira_client=jira_client)
-pipeline.run()
+
+async def main(config:Config,refresh_metadata:bool=False):
+    async with JiraClient(config=config) as jira_client:
+        pipeline = Pipeline(config=config,jira_client=jira_client,refresh_metadata=refresh_metadata)
+        await pipeline.run()
+
+
+# The guard keeps the transform worker processes from re-running the pipeline
+if __name__ == "__main__":
+    args = parse_args()
+    config = Config()
+    setup_logging(config.LOGS_DIR,config.DEBUG_LEVEL,config.LOGGER_NAME)
+
+    asyncio.run(main(config,refresh_metadata=args.refresh_metadata))
 
 
@@ -1,48 +1,133 @@
 from utils.config import Config
 from utils.jira_client import JiraClient
 from extract.extract import Extract
-from transform.transform import Transform
+from transform.transform import Transform, init_worker, transform_batch
 from load.load import Load
+from utils.metadata_cache import MetadataCache
 import math
-import threading
+import asyncio
 import logging
-from concurrent.futures import ThreadPoolExecutor
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
 
 class Pipeline:
-    def __init__(self,config: Config,jira_client=JiraClient):
+    """
+    Producer/consumer pipeline: extract, transform and load run as independent
+    stages connected by queues, so network, CPU and disk work overlap.
+    """
+    def __init__(self,config: Config,jira_client=JiraClient,refresh_metadata=False):
         self.config= config
         self.jira_client = jira_client
+        self.metadata_cache = MetadataCache(config=config)
+        self.refresh_metadata = refresh_metadata
         self.extracter = Extract(config=config,jira_client=jira_client)
         self.transformer = Transform(config=config)
         self.loader = Load(config=config,jira_client=jira_client)
         self.logger = logging.getLogger(self.config.LOGGER_NAME)
+        self._transform_executor = None
+        self._errors = []
 
-    def run(self):
-        nbIssues = self.jira_client.countTotalIussues(self.config.JIRA_PROJECT)
-        iterations = math.ceil(nbIssues / int(self.config.BATCH_SIZE))
-
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            futures = []
-            for i in range(iterations):
-                start_index = i * int(self.config.BATCH_SIZE)
-                # submit each batch to the thread pool
-                futures.append(executor.submit(self.run_batch_with_log, start_index))
-
-            # Wait for all batches to finish
-            for future in futures:
-                future.result()
-
-    def run_batch_with_log(self, start_index):
-        thread_name = threading.current_thread().name
-        self.logger.info(f"[Thread {thread_name}] Processing batch starting at index {start_index}")
-        self.run_batch(start_index)
-    def run_batch(self,start):
-        jira_fields_metadata= self.get_metadata()
-        batch_issues = self.extracter.extract_batch_issues(start, self.config.BATCH_SIZE)
-        for issue in batch_issues:
-            transfomred_issue= self.transformer.transform_issue(issue,jira_fields_metadata)
-            self.loader.save_issue(transfomred_issue)
-    def get_metadata(self):
-        return self.jira_client.get_jira_fields_metadata()
-    
+    async def run(self):
+        nbIssues = await self.jira_client.countTotalIussues(self.config.JIRA_PROJECT)
+        iterations = math.ceil(nbIssues / self.config.BATCH_SIZE)
+
+        # Fields mapping is loaded once per run and shared by every batch
+        await self.load_fields_mapping()
+
+        prefetch_depth = self.config.MAX_CONCURRENT_BATCHES
+        transform_workers = self.config.TRANSFORM_WORKERS
+        load_workers = self.config.LOAD_WORKERS
+
+        # Bounded downstream queues apply backpressure on the extract stage
+        batches_to_fetch = [i * self.config.BATCH_SIZE for i in range(iterations)]
+        issues_to_transform = asyncio.Queue(maxsize=2 * transform_workers)
+        issues_to_load = asyncio.Queue(maxsize=2 * load_workers)
+
+        self._errors = []
+        self.loader.open()
+        try:
+            await self._run_stages(batches_to_fetch, issues_to_transform, issues_to_load,
+                                   prefetch_depth, transform_workers, load_workers)
+        finally:
+            self.loader.close()
+
+        if self._errors:
+            raise self._errors[0]
+
+    async def _run_stages(self, batches_to_fetch, issues_to_transform, issues_to_load,
+                          prefetch_depth, transform_workers, load_workers):
+        # Transform is pure-Python CPU work: run it in processes to sidestep the GIL.
+        # Spawned, not forked: the event loop already runs threads (resolver, default executor)
+        with ProcessPoolExecutor(
+            max_workers=transform_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+            initargs=(self.config, self.transformer.id_to_normalized),
+        ) as executor:
+            self._transform_executor = executor
+            workers = [
+                *(asyncio.create_task(self._stage_worker("transform", issues_to_transform, self.transform_batch, issues_to_load))
+                  for _ in range(transform_workers)),
+                *(asyncio.create_task(self._stage_worker("load", issues_to_load, self.load_batch))
+                  for _ in range(load_workers)),
+            ]
+
+            # Each stage is drained before the next one is waited on
+            await self._extract_stage(batches_to_fetch, prefetch_depth, issues_to_transform)
+            await issues_to_transform.join()
+            await issues_to_load.join()
+
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self._transform_executor = None
+
+    async def _stage_worker(self, stage, inbox, handler, outbox=None):
+        while True:
+            item = await inbox.get()
+            try:
+                result = await handler(item)
+                if outbox is not None:
+                    await outbox.put(result)
+            except Exception as e:
+                self.logger.error(f"[{stage}] Echec du batch {item[0]}: {e}")
+                self._errors.append(e)
+            finally:
+                inbox.task_done()
+
+    async def _extract_stage(self, batches_to_fetch, prefetch_depth, outbox):
+        # Pages are prefetched: while batch i waits for room downstream, i+1.. are downloading
+        async for start, fetch in self.extracter.prefetched_batches(batches_to_fetch, prefetch_depth):
+            try:
+                batch_issues = await fetch
+            except Exception as e:
+                self.logger.error(f"[extract] Echec du batch {start}: {e}")
+                self._errors.append(e)
+                continue
+            await outbox.put((start, batch_issues))
+
+    async def transform_batch(self, batch):
+        start, batch_issues = batch
+        # CPU-bound work runs off the event loop so downloads keep flowing
+        loop = asyncio.get_running_loop()
+        transformed_issues = await loop.run_in_executor(
+            self._transform_executor, transform_batch, batch_issues
+        )
+        return start, transformed_issues
+
+    async def load_batch(self, batch):
+        start, transformed_issues = batch
+        await self.loader.save_batch(transformed_issues, start)
+
+    async def load_fields_mapping(self):
+        id_to_normalized = None if self.refresh_metadata else self.metadata_cache.load()
+        if id_to_normalized is not None:
+            self.transformer.set_id_to_normalized(id_to_normalized)
+            return
+        jira_fields_metadata = await self.get_metadata()
+        self.transformer.set_fields_metadata(jira_fields_metadata)
+        self.metadata_cache.save(self.transformer.id_to_normalized)
+
+    async def get_metadata(self):
+        return await self.jira_client.get_jira_fields_metadata()
@@ -3,22 +3,78 @@ from utils.config import Config
 import logging
 import unicodedata
 import re
+from functools import lru_cache
+
+
+# Toute séquence de caractères non alphanumériques ASCII devient un seul tiret
+_NON_ALNUM = re.compile(r'[^a-zA-Z0-9]+')
+# Préfixe des champs personnalisés Jira
+CUSTOM_FIELD_PREFIX = 'customfield_'
+
+
+@lru_cache(maxsize=4096)
+def _normalize(field_name):
+    # Supprimer les accents puis remplacer espaces et caractères spéciaux par des tirets
+    nfkd = unicodedata.normalize('NFKD', field_name)
+    without_accents = ''.join(c for c in nfkd if not unicodedata.combining(c))
+    return _NON_ALNUM.sub('-', without_accents).strip('-').lower()
 
 
 class Transform:
-    def __init__(self, config:Config):
+    def __init__(self, config:Config, fields_metadata=None):
         self.config=config
         self.logger = logging.getLogger(config.LOGGER_NAME) 
+        # Table {id du champ: nom normalisé}, construite une seule fois par run
+        self._id_to_normalized = None
+        if fields_metadata is not None:
+            self.set_fields_metadata(fields_metadata)
 
-    def transform_issue(self,issue, fields_metadata):
+    def set_fields_metadata(self, fields_metadata):
+        """
+        Précalcule la table de correspondance {id du champ: nom normalisé}
+        à partir des métadonnées des champs Jira.
+        
+        Args:
+            fields_metadata (list): Liste des métadonnées des champs
+                                (ex: [{"id": "customfield_15880", "name": "Statut Option"}, ...])
+        """
+        if not isinstance(fields_metadata, list):
+            self.logger.error("fields_metadata doit être une liste")
+            raise ValueError("fields_metadata doit être une liste")
+        
+        self._id_to_normalized = {
+            field["id"]: self.normalize_field_name(field.get("name"))
+            for field in fields_metadata
+            if isinstance(field, dict) and "id" in field
+        }
+        self.logger.info("%d champs Jira indexés", len(self._id_to_normalized))
+
+    @property
+    def id_to_normalized(self):
+        """Table {id du champ: nom normalisé} précalculée (None si non chargée)."""
+        return self._id_to_normalized
+
+    def set_id_to_normalized(self, id_to_normalized):
+        """
+        Charge directement une table {id du champ: nom normalisé} déjà calculée.
+        
+        Args:
+            id_to_normalized (dict): Table de correspondance précalculée
+        """
+        if not isinstance(id_to_normalized, dict):
+            self.logger.error("id_to_normalized doit être un dictionnaire")
+            raise ValueError("id_to_normalized doit être un dictionnaire")
+        self._id_to_normalized = id_to_normalized
+
+    def transform_issue(self,issue, fields_metadata=None):
         """
         Renomme automatiquement tous les champs personnalisés d'une issue Jira
         en utilisant les métadonnées des champs pour générer des noms normalisés.
         
         Args:
             issue (dict): Les données d'une issue Jira sous forme de dictionnaire
-            fields_metadata (list): Liste des métadonnées des champs
-                                (ex: [{"id": "customfield_15880", "name": "Statut Option"}, ...])
+            fields_metadata (list, optional): Liste des métadonnées des champs, utilisée
+                                si la table de correspondance n'a pas encore été construite
         
         Returns:
             dict: Dictionnaire d'issue modifié avec tous les champs personnalisés renommés
@@ -31,22 +87,31 @@ class Transform:
             self.logger.error("L'issue doit contenir la clé 'fields'")
             raise ValueError("L'issue doit contenir la clé 'fields'")
         
-        if not isinstance(fields_metadata, list):
-            self.logger.error("fields_metadata doit être une liste")
-            raise ValueError("fields_metadata doit être une liste")
-        
-        # Étape 1: Récupérer les noms des champs personnalisés
-        custom_fields_names = self.get_custom_fields_names(issue)
+        if self._id_to_normalized is None:
+            if fields_metadata is None:
+                self.logger.error("Aucune métadonnée de champs chargée")
+                raise ValueError("Aucune métadonnée de champs chargée")
+            self.set_fields_metadata(fields_metadata)
         
-        # Étape 2: Pour chaque champ personnalisé, générer et appliquer le renommage
-        for old_name in custom_fields_names:
-            # Générer le nouveau nom normalisé à partir des métadonnées
-            new_name = self.get_normalized_field_name(fields_metadata, old_name)
+        fields = issue['fields']
+        id_to_normalized = self._id_to_normalized
+        # Évalué une fois par issue plutôt qu'à chaque champ renommé
+        debug_enabled = self.logger.isEnabledFor(logging.DEBUG)
+        
+        # Pour chaque champ personnalisé, appliquer le nom normalisé précalculé
+        # (copie des clés car le dictionnaire est modifié pendant le parcours)
+        for old_name in list(fields):
+            if not old_name.startswith(CUSTOM_FIELD_PREFIX):
+                continue
+            new_name = id_to_normalized.get(old_name)
             
-            # Si un nom valide est généré et différent de l'original
+            # Si un nom valide existe et est différent de l'original
             if new_name and new_name != old_name:
-                # Appliquer le renommage (la fonction gère déjà les vérifications)
-                self.rename_customfield(issue, old_name, new_name)
+                if new_name in fields:
+                    self.logger.warning("Nouveau nom de champ %r existe déjà. Écrasement...", new_name)
+                fields[new_name] = fields.pop(old_name)
+                if debug_enabled:
+                    self.logger.debug("Le champ personnalisé %r a été renommé en %r", old_name, new_name)
         
         return issue
 
@@ -54,28 +119,20 @@ class Transform:
     def get_correspond_name_by_field_id(self,fields_metadata, field_name):
         """
         Retourne le nom du champ selon son ID dans une liste de champs Jira.
+        Hors du chemin critique : transform_issue utilise la table précalculée.
         
         Args:
-            fields_list (list): Liste de dictionnaires représentant les champs
-            field_id (str): L'ID du champ à rechercher (ex: "issuetype", "customfield_15880")
+            fields_metadata (list): Liste de dictionnaires représentant les champs
+            field_name (str): L'ID du champ à rechercher (ex: "issuetype", "customfield_15880")
         
         Returns:
             str or None: Le nom du champ correspondant, ou None si non trouvé
         """
-        if not isinstance(fields_metadata, list):
-            self.logger.error("fields_list doit être une liste")
-            raise ValueError("fields_list doit être une liste")
-        
-        if not isinstance(field_name, str):
-            self.logger.error("field_id doit être une chaîne de caractères")
-            raise ValueError("field_id doit être une chaîne de caractères")
-        
         for field in fields_metadata:
             if isinstance(field, dict) and field.get("id") == field_name:
-                self.logger.debug(f"Champ trouvé: {field_name} -> {field.get('name')}")
                 return field.get("name")
         
-        self.logger.warning(f"Champ avec ID '{field_name}' non trouvé")
+        self.logger.warning("Champ avec ID %r non trouvé", field_name)
         return None
 
 
@@ -90,50 +147,36 @@ class Transform:
             str: Nom normalisé sans accents, en minuscules
         """
         if not field_name or not isinstance(field_name, str):
-            self.logger.warning(f"Nom de champ invalide: {field_name}")
+            self.logger.warning("Nom de champ invalide: %r", field_name)
             return ""
         
-        # Étape 1: Supprimer les accents et caractères spéciaux
-        normalized = unicodedata.normalize('NFKD', field_name)
-        without_accents = ""
-        for char in normalized:
-            if unicodedata.combining(char):
-                continue
-            without_accents += char
-        
-        # Étape 2: Remplacer les espaces par des tirets et nettoyer
-        cleaned = re.sub(r'\s+', '-', without_accents)
-        cleaned = re.sub(r'[^a-zA-Z0-9\-]', '-', cleaned)
-        cleaned = re.sub(r'-+', '-', cleaned).strip('-')
+        result = _normalize(field_name)
         
-        # Mettre en minuscules
-        result = cleaned.lower()
-        
-        self.logger.debug(f"Nom normalisé: '{field_name}' -> '{result}'")
+        self.logger.debug("Nom normalisé: %r -> %r", field_name, result)
         return result
 
 
-    def get_normalized_field_name(self,fields_list, field_id):
+    def get_normalized_field_name(self, field_id):
         """
-        Combine les deux fonctions : récupère le nom et le normalise.
+        Récupère le nom normalisé d'un champ dans la table précalculée.
         
         Args:
-            fields_list (list): Liste des champs
             field_id (str): ID du champ
             
         Returns:
             str: Nom normalisé du champ
         """
-        field_name = self.get_correspond_name_by_field_id(fields_list, field_id)
-        if field_name:
-            return self.normalize_field_name(field_name)
-        self.logger.debug(f"Aucun nom normalisé pour field_id: {field_id}")
+        normalized_name = self._id_to_normalized.get(field_id)
+        if normalized_name:
+            return normalized_name
+        self.logger.debug("Aucun nom normalisé pour field_id: %s", field_id)
         return ""
 
 
     def rename_customfield(self,issue, old_name, new_name):
         """
         Renomme un champ personnalisé dans un dictionnaire d'issue Jira.
+        Hors du chemin critique : transform_issue renomme directement les champs.
         
         Args:
             issue (dict): Les données d'une issue Jira sous forme de dictionnaire
@@ -143,32 +186,23 @@ class Transform:
         Returns:
             dict: Dictionnaire d'issue modifié avec le champ renommé
         """
-        if not isinstance(issue, dict):
-            self.logger.error("L'issue doit être un dictionnaire")
-            raise ValueError("L'issue doit être un dictionnaire")
-        
-        if 'fields' not in issue:
-            self.logger.error("L'issue doit contenir la clé 'fields'")
-            raise ValueError("L'issue doit contenir la clé 'fields'")
-        
         fields = issue['fields']
         
         if old_name not in fields:
-            self.logger.warning(f"Champ personnalisé '{old_name}' non trouvé dans l'issue")
+            self.logger.warning("Champ personnalisé %r non trouvé dans l'issue", old_name)
             return issue
         
         if new_name in fields:
-            self.logger.warning(f"Nouveau nom de champ '{new_name}' existe déjà. Écrasement...")
+            self.logger.warning("Nouveau nom de champ %r existe déjà. Écrasement...", new_name)
         
         fields[new_name] = fields.pop(old_name)
-        self.logger.info(f"Le champ personnalisé '{old_name}' a été renommé en '{new_name}'")
-        
         return issue
 
 
     def get_custom_fields_names(self,issue):
         """
         Extrait tous les champs personnalisés (commençant par 'customfield_') d'une issue Jira.
+        Hors du chemin critique : transform_issue filtre les champs directement.
         
         Args:
             issue (dict): Données de l'issue Jira
@@ -176,15 +210,23 @@ class Transform:
         Returns:
             list: Liste des noms de champs personnalisés
         """
-        if not isinstance(issue, dict) or 'fields' not in issue:
-            self.logger.error("Structure d'issue Jira invalide")
-            raise ValueError("Structure d'issue Jira invalide")
-        
-        fields = issue['fields']
-        custom_field_names = [
-            field_name for field_name in fields.keys()
-            if field_name.startswith('customfield_')
-        ]
-        
-        self.logger.info(f"{len(custom_field_names)} champs personnalisés trouvés: {custom_field_names}")
-        return custom_field_names
\ No newline at end of file
+        return [field_name for field_name in issue['fields'] if field_name.startswith(CUSTOM_FIELD_PREFIX)]
+
+
+# Transform propre à chaque processus du pool de transformation (voir init_worker)
+_worker_transformer = None
+
+
+def init_worker(config, id_to_normalized):
+    """
+    Initialiseur du ProcessPoolExecutor : la table de correspondance n'est
+    sérialisée qu'une seule fois par processus, et non à chaque batch.
+    """
+    global _worker_transformer
+    _worker_transformer = Transform(config=config)
+    _worker_transformer.set_id_to_normalized(id_to_normalized)
+
+
+def transform_batch(batch_issues):
+    """Transforme un batch d'issues dans un processus du pool."""
+    return [_worker_transformer.transform_issue(issue) for issue in batch_issues]
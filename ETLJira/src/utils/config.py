@@ -6,8 +6,37 @@ load_dotenv()
 
 class Config:
     """
-    Configuration class to load environment variables for JIRA ETL pipeline
+    Configuration class to load environment variables for JIRA ETL pipeline.
+    Values are coerced to their type once, at load time.
     """
+    __slots__ = (
+        "JIRA_BASE_URL",
+        "JIRA_USERNAME",
+        "JIRA_PASSWORD",
+        "JIRA_PROJECT",
+        "BATCH_SIZE",
+        "JIRA_FIELDS",
+        "JIRA_EXPAND",
+        "JIRA_UPDATED_SINCE",
+        "CACHE_DIR",
+        "CACHE_TTL_SECONDS",
+        "MAX_CONCURRENT_BATCHES",
+        "HTTP_MAX_CONNECTIONS",
+        "HTTP_KEEPALIVE_TIMEOUT",
+        "HTTP_CONNECT_TIMEOUT",
+        "HTTP_READ_TIMEOUT",
+        "HTTP_MAX_RETRIES",
+        "HTTP_BACKOFF_FACTOR",
+        "ATTACHMENT_WORKERS",
+        "TRANSFORM_WORKERS",
+        "LOAD_WORKERS",
+        "DEBUG_LEVEL",
+        "LOGS_DIR",
+        "LOGGER_NAME",
+        "ETL_OUTPUT_DIR",
+        "OUTPUT_MODE",
+    )
+
     def __init__(self):
         # JIRA connection
         self.JIRA_BASE_URL = os.getenv("JIRA_BASE_URL", "")
@@ -16,14 +45,39 @@ class Config:
         self.JIRA_PROJECT = os.getenv("JIRA_PROJECT", "")
 
         # JIRA search
-        self.BATCH_SIZE = os.getenv("BATCH_SIZE", 50)
+        self.BATCH_SIZE = int(os.getenv("BATCH_SIZE", 50))
+        # Only request the fields we need: "*all" and rendered fields inflate the payload
+        self.JIRA_FIELDS = os.getenv("JIRA_FIELDS", "attachment,summary,issuetype,status,*navigable")
+        self.JIRA_EXPAND = os.getenv("JIRA_EXPAND", "")
+        # Incremental refresh, e.g. "-24h" or "2024-01-31" (empty: every issue of the project)
+        self.JIRA_UPDATED_SINCE = os.getenv("JIRA_UPDATED_SINCE", "")
+
+        # Fields metadata disk cache (0 disables it)
+        self.CACHE_DIR = os.getenv("CACHE_DIR", "~/.cache/jira-ia")
+        self.CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", 24 * 3600))
+
+        # Concurrency
+        self.MAX_CONCURRENT_BATCHES = int(os.getenv("MAX_CONCURRENT_BATCHES", 8))
+        self.HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", 32))
+        self.HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", 30))
+        # No total timeout: large attachments may legitimately stream for a long time,
+        # only connecting and waiting between two reads are bounded
+        self.HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 30))
+        self.HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", 300))
+        self.HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", 5))
+        self.HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", 0.5))
+        self.ATTACHMENT_WORKERS = int(os.getenv("ATTACHMENT_WORKERS", 8))
+        self.TRANSFORM_WORKERS = int(os.getenv("TRANSFORM_WORKERS", os.cpu_count() or 1))
+        self.LOAD_WORKERS = int(os.getenv("LOAD_WORKERS", 4))
 
         # Logging
-        self.DEBUG_LEVEL = os.getenv("DEBUG_LEVEL", "INFO")
+        self.DEBUG_LEVEL = os.getenv("DEBUG_LEVEL", "INFO").upper()
         self.LOGS_DIR = os.getenv("LOGS_DIR", "./logs")
         self.LOGGER_NAME = os.getenv("LOGGER_NAME", "jira_logger")
         
         self.ETL_OUTPUT_DIR = os.getenv("ETL_OUTPUT_DIR", "data")
+        # "per-issue" (one folder per issue) or "aggregated" (one folder per run: NDJSON file + one zip per batch)
+        self.OUTPUT_MODE = os.getenv("OUTPUT_MODE", "per-issue")
 
 
     def __repr__(self):
@@ -32,8 +86,24 @@ class Config:
             f"JIRA_USERNAME={self.JIRA_USERNAME}, "
             f"JIRA_PROJECT={self.JIRA_PROJECT}, "
             f"BATCH_SIZE={self.BATCH_SIZE}, "
+            f"JIRA_FIELDS={self.JIRA_FIELDS}, "
+            f"JIRA_EXPAND={self.JIRA_EXPAND}, "
+            f"JIRA_UPDATED_SINCE={self.JIRA_UPDATED_SINCE}, "
+            f"CACHE_DIR={self.CACHE_DIR}, "
+            f"CACHE_TTL_SECONDS={self.CACHE_TTL_SECONDS}, "
+            f"MAX_CONCURRENT_BATCHES={self.MAX_CONCURRENT_BATCHES}, "
+            f"HTTP_MAX_CONNECTIONS={self.HTTP_MAX_CONNECTIONS}, "
+            f"HTTP_KEEPALIVE_TIMEOUT={self.HTTP_KEEPALIVE_TIMEOUT}, "
+            f"HTTP_CONNECT_TIMEOUT={self.HTTP_CONNECT_TIMEOUT}, "
+            f"HTTP_READ_TIMEOUT={self.HTTP_READ_TIMEOUT}, "
+            f"HTTP_MAX_RETRIES={self.HTTP_MAX_RETRIES}, "
+            f"HTTP_BACKOFF_FACTOR={self.HTTP_BACKOFF_FACTOR}, "
+            f"ATTACHMENT_WORKERS={self.ATTACHMENT_WORKERS}, "
+            f"TRANSFORM_WORKERS={self.TRANSFORM_WORKERS}, "
+            f"LOAD_WORKERS={self.LOAD_WORKERS}, "
             f"DEBUG_LEVEL={self.DEBUG_LEVEL}, "
             f"LOGS_DIR={self.LOGS_DIR}, "
-            f"LOGGER_NAME={self.LOGGER_NAME})"
-            f"ETL_OUTPUT_DIR={self.ETL_OUTPUT_DIR})"
+            f"LOGGER_NAME={self.LOGGER_NAME}, "
+            f"ETL_OUTPUT_DIR={self.ETL_OUTPUT_DIR}, "
+            f"OUTPUT_MODE={self.OUTPUT_MODE})"
         )
@@ -1,26 +1,220 @@
 # utils/file_manager.py
 import os
-import json
+import io
+import mmap
 import logging
+import asyncio
+import zipfile
+import shutil
+import tempfile
+from datetime import datetime
+import aiofiles
 from utils.config import Config
-import requests
+from utils.json_utils import dumps
+from blake3 import blake3
+
+# Aggregated mode batches write() syscalls through a large buffer
+NDJSON_BUFFER_SIZE = 4 * 1024 * 1024
+# Large attachments bypass the page cache (O_DIRECT) where the platform allows it
+DIRECT_IO_THRESHOLD = 16 * 1024 * 1024
+DIRECT_IO_ALIGNMENT = 4096
+DIRECT_IO_BUFFER_SIZE = 4 * 1024 * 1024
+ATTACHMENT_BUFFER_SIZE = 1024 * 1024
+
+
+class DirectFileWriter:
+    """
+    Write a file with O_DIRECT: data is staged in a page-aligned mmap buffer and
+    flushed in aligned blocks; the padding of the last block is truncated on close.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_DIRECT, 0o644)
+        self._buffer = mmap.mmap(-1, DIRECT_IO_BUFFER_SIZE)
+        self._used = 0
+        self._size = 0
+
+    async def write(self, data):
+        view = memoryview(data)
+        while view:
+            n = min(len(view), DIRECT_IO_BUFFER_SIZE - self._used)
+            self._buffer[self._used:self._used + n] = view[:n]
+            self._used += n
+            view = view[n:]
+            if self._used == DIRECT_IO_BUFFER_SIZE:
+                await asyncio.to_thread(self._write_block, DIRECT_IO_BUFFER_SIZE)
+                self._used = 0
+        self._size += len(data)
+
+    def _write_block(self, length):
+        with memoryview(self._buffer) as buffer, buffer[:length] as block:
+            if os.write(self._fd, block) != length:
+                raise OSError(f"Écriture O_DIRECT incomplète : {self.path}")
+
+    async def close(self):
+        try:
+            if self._used:
+                aligned = -(-self._used // DIRECT_IO_ALIGNMENT) * DIRECT_IO_ALIGNMENT
+                self._buffer[self._used:aligned] = bytes(aligned - self._used)
+                await asyncio.to_thread(self._write_block, aligned)
+                os.ftruncate(self._fd, self._size)
+        finally:
+            os.close(self._fd)
+            self._buffer.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+
+def open_attachment_writer(path, expected_size=None):
+    """
+    Async file writer for an attachment: O_DIRECT for large files, so they do not
+    evict useful data from the page cache, buffered aiofiles otherwise.
+    """
+    if hasattr(os, "O_DIRECT") and expected_size is not None and int(expected_size) >= DIRECT_IO_THRESHOLD:
+        try:
+            return DirectFileWriter(path)
+        except OSError:
+            # Some filesystems (tmpfs, network mounts) refuse O_DIRECT
+            pass
+    return aiofiles.open(path, "wb", buffering=ATTACHMENT_BUFFER_SIZE)
+
+
+class AttachmentArchive:
+    """
+    Zip archive holding the attachments of one batch (aggregated output mode).
+
+    Attachments are downloaded in parallel to staging files next to the archive,
+    then added one at a time (a zip has a single writer) under `lock`, so only
+    fully downloaded files ever become entries.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.lock = asyncio.Lock()
+        self.staging_dir = tempfile.mkdtemp(prefix=".staging-", dir=os.path.dirname(path))
+        # Attachments are usually already compressed: store them as-is
+        self._zip = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED, allowZip64=True)
+
+    def staging_path(self):
+        fd, path = tempfile.mkstemp(dir=self.staging_dir)
+        os.close(fd)
+        return path
+
+    async def add(self, file_path, name):
+        async with self.lock:
+            # Copying into the zip is blocking disk I/O: keep it off the event loop
+            await asyncio.to_thread(self._zip.write, file_path, name)
+
+    def close(self):
+        try:
+            self._zip.close()
+        finally:
+            shutil.rmtree(self.staging_dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
 
 
 class FileManager:
     def __init__(self, config:Config):
         self.config=config
         self.logger = logging.getLogger(config.LOGGER_NAME)
+        # Folders known to exist, per base directory (listed once with os.scandir)
+        self._existing_dirs = {}
     def create_issue_folder(self,base_dir, issue_key):
         issue_dir = os.path.join(base_dir, issue_key)
         os.makedirs(issue_dir, exist_ok=True)
         self.logger.debug(f"Dossier créé/vérifié : {issue_dir}")
         return issue_dir
 
-    def save_json(self,data, folder, issue_key):
+    def create_issue_folders(self,base_dir, issue_keys):
+        # The base directory is listed once, then only the missing issue folders are created
+        existing_dirs = self._list_existing_dirs(base_dir)
+        issue_dirs = []
+        for issue_key in issue_keys:
+            issue_dir = os.path.join(base_dir, issue_key)
+            if issue_key not in existing_dirs:
+                try:
+                    os.mkdir(issue_dir)
+                except FileExistsError:
+                    pass
+                existing_dirs.add(issue_key)
+            issue_dirs.append(issue_dir)
+        self.logger.debug(f"{len(issue_dirs)} dossiers créés/vérifiés dans {base_dir}")
+        return issue_dirs
+
+    def _list_existing_dirs(self, base_dir):
+        existing_dirs = self._existing_dirs.get(base_dir)
+        if existing_dirs is None:
+            os.makedirs(base_dir, exist_ok=True)
+            with os.scandir(base_dir) as entries:
+                existing_dirs = {entry.name for entry in entries if entry.is_dir()}
+            self._existing_dirs[base_dir] = existing_dirs
+        return existing_dirs
+
+    async def save_json(self,data, folder, issue_key):
         file_path = os.path.join(folder, f"{issue_key}.json")
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+        hash_path = f"{file_path}.hash"
+        payload = dumps(data)
+        content_hash = self.content_hash(payload)
+
+        # Unchanged issue: the hash of the previous run matches, skip the rewrite
+        if os.path.isfile(file_path) and os.path.isfile(hash_path):
+            async with aiofiles.open(hash_path, "r", encoding="utf-8") as f:
+                if (await f.read()).strip() == content_hash:
+                    self.logger.debug("[%s] JSON inchangé : %s", issue_key, file_path)
+                    return
+
+        async with aiofiles.open(file_path, "wb") as f:
+            await f.write(payload)
+        async with aiofiles.open(hash_path, "w", encoding="utf-8") as f:
+            await f.write(content_hash)
         self.logger.info(f"[{issue_key}] JSON sauvegardé : {file_path}")
+
+    @staticmethod
+    def content_hash(payload: bytes) -> str:
+        return f"blake3:{blake3(payload).hexdigest()}"
+
+    def create_run_folder(self, base_dir):
+        # One folder per aggregated run (NDJSON, archives, index), so an incremental
+        # run restarting at startAt=0 never overwrites the files of a previous one
+        run_id = datetime.now().strftime("%Y%m%d-%H%M%S")
+        run_dir = os.path.join(base_dir, "runs", run_id)
+        suffix = 1
+        while True:
+            try:
+                os.makedirs(run_dir)
+                break
+            except FileExistsError:
+                run_dir = os.path.join(base_dir, "runs", f"{run_id}-{suffix}")
+                suffix += 1
+        self.logger.info(f"Dossier du run créé : {run_dir}")
+        return run_dir
+
+    def open_ndjson_writer(self, run_dir, file_name="issues.ndjson"):
+        file_path = os.path.join(run_dir, file_name)
+        writer = io.BufferedWriter(io.FileIO(file_path, "xb"), buffer_size=NDJSON_BUFFER_SIZE)
+        self.logger.info(f"Fichier NDJSON ouvert : {file_path}")
+        return writer
+
+    def open_attachment_archive(self, run_dir, batch_start):
+        archive_dir = os.path.join(run_dir, "attachments")
+        os.makedirs(archive_dir, exist_ok=True)
+        return AttachmentArchive(os.path.join(archive_dir, f"batch-{batch_start}.zip"))
+
+    async def save_batch_index(self, index, run_dir, batch_start):
+        index_dir = os.path.join(run_dir, "index")
+        os.makedirs(index_dir, exist_ok=True)
+        file_path = os.path.join(index_dir, f"batch-{batch_start}.json")
+        async with aiofiles.open(file_path, "wb") as f:
+            await f.write(dumps(index))
+        self.logger.info(f"[BATCH {batch_start}] Index sauvegardé : {file_path}")
     
         
     # def download_attachments(self,issue_key, attachments, issue_dir, auth):
@@ -1,9 +1,19 @@
 
-import requests
-from requests.auth import HTTPBasicAuth
+import aiohttp
+import asyncio
+from contextlib import asynccontextmanager
 from .config import Config
+from .json_utils import loads
+from .rate_limiter import RateLimiter
+from .file_manager import open_attachment_writer
 import os
 import logging
+import ijson
+
+# Attachments are streamed to disk by chunks instead of being buffered in memory
+ATTACHMENT_CHUNK_SIZE = 1024 * 1024
+# Transient statuses worth retrying (rate limit and gateway errors)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
 
 class JiraClient:
     def __init__(self,config:Config):
@@ -11,69 +21,243 @@ class JiraClient:
         self.jira_username=config.JIRA_USERNAME
         self.jira_password=config.JIRA_PASSWORD
         self.jira_project=config.JIRA_PROJECT
-            # Create a session for connection reuse
-        self.session = requests.Session()
-        self.session.auth = HTTPBasicAuth(self.jira_username, self.jira_password)
-        self.session.headers.update({
-            "Accept": "application/json",
-            "Content-Type": "application/json"
-        })
+        self.jira_updated_since=config.JIRA_UPDATED_SINCE
+        self.http_max_connections=config.HTTP_MAX_CONNECTIONS
+        self.http_keepalive_timeout=config.HTTP_KEEPALIVE_TIMEOUT
+        self.http_timeout=aiohttp.ClientTimeout(
+            total=None,
+            sock_connect=config.HTTP_CONNECT_TIMEOUT,
+            sock_read=config.HTTP_READ_TIMEOUT,
+        )
+        self.http_max_retries=config.HTTP_MAX_RETRIES
+        self.http_backoff_factor=config.HTTP_BACKOFF_FACTOR
+        # The session must be created inside the running event loop (see open())
+        self.session = None
+        # Fields metadata is identical for the whole run: fetched once, then memoized
+        self._fields_metadata = None
+        self._fields_metadata_lock = asyncio.Lock()
+        # Dedicated pool of download slots shared by all issues, so attachments
+        # are fetched in parallel without starving the search requests
+        self._attachment_slots = asyncio.Semaphore(config.ATTACHMENT_WORKERS)
+        # Shared by every request, sized from the Jira rate-limit headers
+        self.rate_limiter = RateLimiter(self.http_max_connections, config.LOGGER_NAME)
         self.logger = logging.getLogger(config.LOGGER_NAME)
-    def countTotalIussues(self,project:str)->int:
+
+    async def open(self):
+        # Create a session for connection reuse
+        self.session = aiohttp.ClientSession(
+            auth=aiohttp.BasicAuth(self.jira_username, self.jira_password),
+            headers={
+                "Accept": "application/json",
+                "Accept-Encoding": "gzip, deflate",
+                "Content-Type": "application/json"
+            },
+            connector=aiohttp.TCPConnector(
+                limit=self.http_max_connections,
+                limit_per_host=self.http_max_connections,
+                keepalive_timeout=self.http_keepalive_timeout,
+            ),
+            timeout=self.http_timeout,
+        )
+        return self
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def countTotalIussues(self,project:str)->int:
         url = f"{self.jira_base_url}/rest/api/2/search"
         params={
-            "jql": f"project={self.jira_project}",
+            "jql": self._jql(),
             "startAt":0,
             "maxResults":0,
             "fields":"none"
         }
-        response = self.session.get(url,params=params)
-        self._check_response(response)
-        data=response.json()
+        data = await self._get_json(url,params=params)
 
         return data["total"]
-    
-    def getBatchIssues(self,start,maxResults):
+
+    async def iter_batch_issues(self,start,maxResults,fields="*all",expand=None):
+        """
+        Yield the issues of a search page one at a time, parsed from the response
+        stream, so the raw body and the full search document are never held in memory.
+        """
         url = f"{self.jira_base_url}/rest/api/2/search"
+        params = self._batch_params(start,maxResults,fields,expand)
+        async with self._get(url, params=params) as response:
+            await self._check_response(response)
+            # use_float: keep floats as float (Decimal is not JSON-serializable by orjson)
+            async for issue in ijson.items_async(response.content, "issues.item", use_float=True):
+                yield issue
+
+    def _jql(self):
+        jql = f"project={self.jira_project}"
+        if self.jira_updated_since:
+            # Incremental refresh: only the issues updated in the window (e.g. "-24h")
+            jql += f' AND updated >= "{self.jira_updated_since}"'
+        return jql
+
+    def _batch_params(self,start,maxResults,fields,expand):
         params = {
-            "jql": f"project={self.jira_project}",
+            "jql": self._jql(),
             "startAt": start,
             "maxResults": maxResults,
-            "fields": "*all",          # fetch all fields
-            "expand": "renderedFields" # always include rendered fields
+            "fields": fields,          # comma-separated projection ("*all" fetches everything)
         }
-        response = self.session.get(url,params=params)
-        self._check_response(response)
-        data=response.json()
-
-        return data
-    
-    def download_attachments(self, issue_key, attachments, issue_dir):
-        for attachment in attachments:
-            file_url = attachment["content"]
-            file_name = attachment["filename"]
-            try:
-                response = self.session.get(file_url)
-                if response.status_code == 200:
-                    file_path = os.path.join(issue_dir, file_name)
-                    with open(file_path, "wb") as f:
-                        f.write(response.content)
+        if expand:
+            params["expand"] = expand  # e.g. "renderedFields"
+        return params
+
+    async def download_attachments(self, issue_key, attachments, issue_dir):
+        # All the attachments of an issue are fetched concurrently
+        await asyncio.gather(*(
+            self._download_attachment(issue_key, attachment, issue_dir)
+            for attachment in attachments
+        ))
+
+    async def _download_attachment(self, issue_key, attachment, issue_dir):
+        async with self._attachment_slots:
+            await self._download_one(issue_key, attachment, issue_dir)
+
+    async def _download_one(self, issue_key, attachment, issue_dir):
+        file_url = attachment["content"]
+        file_name = attachment["filename"]
+        file_path = os.path.join(issue_dir, file_name)
+        try:
+            if self._is_already_downloaded(file_path, attachment.get("size")):
+                self.logger.debug(f"[{issue_key}] Attachment déjà présent: {file_name}")
+                return
+            async with self._get(file_url) as response:
+                if response.status == 200:
+                    if self._is_already_downloaded(file_path, response.content_length):
+                        self.logger.debug(f"[{issue_key}] Attachment déjà présent: {file_name}")
+                        return
+                    expected_size = attachment.get("size") or response.content_length
+                    async with open_attachment_writer(file_path, expected_size) as f:
+                        async for chunk in response.content.iter_chunked(ATTACHMENT_CHUNK_SIZE):
+                            await f.write(chunk)
                     self.logger.info(f"[{issue_key}] Attachment sauvegardé: {file_name}")
                 else:
-                    self.logger.warning(f"[{issue_key}] Probleme de chargement {file_name}: HTTP {response.status_code}")
-            except Exception as e:
-                self.logger.error(f"[{issue_key}] Probleme de chargement {file_name}: {e}")
+                    self.logger.warning(f"[{issue_key}] Probleme de chargement {file_name}: HTTP {response.status}")
+        except Exception as e:
+            self.logger.error(f"[{issue_key}] Probleme de chargement {file_name}: {e}")
+
+    async def download_attachments_to_archive(self, issue_key, attachments, archive):
+        """Return the archive entries of the attachments that were fully written."""
+        entries = await asyncio.gather(*(
+            self._archive_attachment(issue_key, attachment, archive)
+            for attachment in attachments
+        ))
+        return [entry for entry in entries if entry is not None]
+
+    async def _archive_attachment(self, issue_key, attachment, archive):
+        file_url = attachment["content"]
+        file_name = attachment["filename"]
+        entry_name = f"{issue_key}/{file_name}"
+        staging_path = archive.staging_path()
+        try:
+            async with self._attachment_slots:
+                async with self._get(file_url) as response:
+                    if response.status != 200:
+                        self.logger.warning(f"[{issue_key}] Probleme de chargement {file_name}: HTTP {response.status}")
+                        return None
+                    expected_size = attachment.get("size") or response.content_length
+                    async with open_attachment_writer(staging_path, expected_size) as f:
+                        async for chunk in response.content.iter_chunked(ATTACHMENT_CHUNK_SIZE):
+                            await f.write(chunk)
+            # Only a complete download reaches the zip
+            await archive.add(staging_path, entry_name)
+            self.logger.info(f"[{issue_key}] Attachment archivé: {file_name}")
+            return entry_name
+        except Exception as e:
+            self.logger.error(f"[{issue_key}] Probleme de chargement {file_name}: {e}")
+            return None
+        finally:
+            os.remove(staging_path)
+
+    @staticmethod
+    def _is_already_downloaded(file_path, expected_size):
+        # Resume support: a file of the expected size was written by a previous run
+        return expected_size is not None and os.path.isfile(file_path) \
+            and os.path.getsize(file_path) == int(expected_size)
+
+    @asynccontextmanager
+    async def _get(self, url, params=None):
+        """
+        GET with retries, honoring the Jira rate-limit headers.
+
+        A rate-limiter permit is only held while the request is sent and its
+        headers come back: reading the body (attachments, streamed search pages)
+        never holds back the other requests.
+        """
+        for attempt in range(self.http_max_retries + 1):
+            last_attempt = attempt == self.http_max_retries
+            async with self.rate_limiter:
+                try:
+                    response = await self.session.get(url, params=params)
+                except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                    if last_attempt:
+                        raise
+                    self.logger.warning(f"Erreur réseau sur {url}: {e}. Nouvel essai...")
+                    response = None
+                else:
+                    try:
+                        await self.rate_limiter.update_from_headers(response.headers)
+                    except BaseException:
+                        response.release()
+                        raise
+
+            if response is None:
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+            if response.status not in RETRY_STATUSES or last_attempt:
+                try:
+                    yield response
+                finally:
+                    response.release()
+                return
+
+            response.release()
+            if response.status == 429:
+                # Wait exactly what Jira asks for, and hold back every other request too
+                delay = self._retry_after(response, attempt)
+                self.rate_limiter.pause(delay)
+            else:
+                delay = self._backoff(attempt)
+            self.logger.warning(f"HTTP {response.status} sur {url}. Nouvel essai dans {delay:.1f}s...")
+            await asyncio.sleep(delay)
+
+    def _retry_after(self, response, attempt):
+        try:
+            return float(response.headers["retry-after"])
+        except (KeyError, ValueError):
+            return self._backoff(attempt)
+
+    def _backoff(self, attempt):
+        return self.http_backoff_factor * (2 ** attempt)
+
+    async def _get_json(self, url, params=None):
+        async with self._get(url, params=params) as response:
+            await self._check_response(response)
+            return loads(await response.read())
 
-    
-    def _check_response(self, response):
-        if not response.ok: 
+    async def _check_response(self, response):
+        if not response.ok:
             raise Exception(
-                f"JIRA API Error {response.status_code}: {response.text}"
+                f"JIRA API Error {response.status}: {await response.text()}"
             )
 
 
-    def get_jira_fields_metadata(self):
-        url = f"{self.jira_base_url}/rest/api/2/field"
-        response = self.session.get(url)
-        self._check_response(response)
-        return response.json()
\ No newline at end of file
+    async def get_jira_fields_metadata(self):
+        async with self._fields_metadata_lock:
+            if self._fields_metadata is None:
+                url = f"{self.jira_base_url}/rest/api/2/field"
+                self._fields_metadata = await self._get_json(url)
+        return self._fields_metadata
@@ -0,0 +1,28 @@
+# utils/json_utils.py
+import json
+
+try:
+    import orjson
+except ImportError:  # orjson est optionnel : repli sur la lib standard
+    orjson = None
+
+
+def loads(data):
+    """Désérialise du JSON (bytes ou str), avec orjson si disponible."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(data) -> bytes:
+    """Sérialise en JSON UTF-8 indenté, directement en bytes."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+def dumps_line(data) -> bytes:
+    """Sérialise en une ligne JSON compacte terminée par un saut de ligne (NDJSON)."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS)
+    return (json.dumps(data, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
@@ -30,8 +30,9 @@ def setup_logging(log_dir: str, level: str = "INFO", logger_name: str = "jira_ex
     logger.addHandler(fh)
 
     # Réduire le bruit des libs
-    logging.getLogger("urllib3").setLevel(logging.WARNING)
-    logging.getLogger("requests").setLevel(logging.WARNING)
+    logging.getLogger("urllib3").setLevel(logging.ERROR)
+    logging.getLogger("requests").setLevel(logging.ERROR)
+    logging.getLogger("aiohttp").setLevel(logging.ERROR)
 
     logger.debug("Logging initialisé (console + fichier).")
     return logger
\ No newline at end of file
@@ -0,0 +1,56 @@
+# utils/metadata_cache.py
+import os
+import time
+import pickle
+import hashlib
+import logging
+from utils.config import Config
+
+# Bumped whenever the field-name normalization changes, so stale mappings are ignored
+CACHE_FORMAT_VERSION = 2
+
+
+class MetadataCache:
+    """
+    Disk cache of the normalized Jira fields mapping {id: normalized_name}.
+
+    The Jira schema rarely changes: one file per (Jira URL, project) saves the
+    /rest/api/2/field round-trip and the name normalization on every run.
+    """
+    def __init__(self, config:Config):
+        self.config = config
+        self.ttl_seconds = config.CACHE_TTL_SECONDS
+        cache_key = hashlib.sha256(f"{config.JIRA_BASE_URL}|{config.JIRA_PROJECT}".encode("utf-8")).hexdigest()[:16]
+        self.path = os.path.join(os.path.expanduser(config.CACHE_DIR), f"fields.v{CACHE_FORMAT_VERSION}.{cache_key}.pkl")
+        self.logger = logging.getLogger(config.LOGGER_NAME)
+
+    def load(self):
+        """Return the cached mapping, or None if missing, expired or unreadable."""
+        if self.ttl_seconds <= 0 or not os.path.isfile(self.path):
+            return None
+        if time.time() - os.path.getmtime(self.path) >= self.ttl_seconds:
+            self.logger.info(f"Cache des métadonnées expiré : {self.path}")
+            return None
+        try:
+            with open(self.path, "rb") as f:
+                id_to_normalized = pickle.load(f)
+        except Exception as e:
+            # A truncated or foreign pickle can raise almost anything (AttributeError, ImportError...)
+            self.logger.warning(f"Cache des métadonnées illisible ({self.path}): {e}")
+            return None
+        if not isinstance(id_to_normalized, dict):
+            self.logger.warning(f"Cache des métadonnées invalide ({self.path}): {type(id_to_normalized).__name__}")
+            return None
+        self.logger.info(f"Métadonnées des champs chargées depuis le cache : {self.path}")
+        return id_to_normalized
+
+    def save(self, id_to_normalized):
+        if self.ttl_seconds <= 0:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Write then rename, so a concurrent run never reads a partial file
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(id_to_normalized, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+        self.logger.info(f"Métadonnées des champs mises en cache : {self.path}")
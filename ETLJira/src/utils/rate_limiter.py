@@ -0,0 +1,75 @@
+# utils/rate_limiter.py
+import asyncio
+import logging
+import math
+
+
+class RateLimiter:
+    """
+    Shared limit on the number of concurrent Jira requests.
+
+    The limit adapts to the rate-limit headers returned by Jira
+    (x-ratelimit-fillrate / x-ratelimit-interval-seconds), and a 429 pauses
+    every request until the Retry-After delay has elapsed.
+    """
+    def __init__(self, max_permits: int, logger_name: str):
+        self.max_permits = max_permits
+        self._limit = max_permits
+        self._in_use = 0
+        self._resume_at = 0.0
+        self._condition = asyncio.Condition()
+        self.logger = logging.getLogger(logger_name)
+
+    @property
+    def limit(self):
+        return self._limit
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            delay = self._resume_at - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            async with self._condition:
+                await self._condition.wait_for(lambda: self._in_use < self._limit)
+                # A pause may have been requested while waiting for a permit
+                if self._resume_at <= loop.time():
+                    self._in_use += 1
+                    return
+
+    async def release(self):
+        async with self._condition:
+            self._in_use -= 1
+            self._condition.notify()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.release()
+
+    def pause(self, seconds: float):
+        """Hold back every new request for `seconds`."""
+        resume_at = asyncio.get_running_loop().time() + seconds
+        if resume_at > self._resume_at:
+            self._resume_at = resume_at
+            self.logger.warning(f"Rate limit Jira atteint: pause de {seconds:.1f}s")
+
+    async def update_from_headers(self, headers):
+        fill_rate = headers.get("x-ratelimit-fillrate")
+        interval = headers.get("x-ratelimit-interval-seconds")
+        if not fill_rate or not interval:
+            return
+        try:
+            limit = math.ceil(float(fill_rate) / float(interval))
+        except (ValueError, ZeroDivisionError):
+            return
+        limit = max(1, min(limit, self.max_permits))
+        if limit == self._limit:
+            return
+        async with self._condition:
+            self._limit = limit
+            self._condition.notify_all()
+        self.logger.info(f"Concurrence Jira ajustée à {limit} requêtes")